@@ -80,6 +80,14 @@ async def startup_event():
     """Initialize the pipeline on startup."""
     logger.info("Initializing Quran Chatbot API...")
     get_pipeline()
+    try:
+        from utils.embedding_utils import warmup
+        from services.retrievers.dispatcher import warmup_topic_expansion
+        warmup()
+        warmup_topic_expansion()
+    except Exception as e:
+        # topic_expansion degrades gracefully without embeddings – don't block start-up
+        logger.warning(f"Embedding warm-up skipped: {e}")
     logger.info("Quran Chatbot API initialized successfully")
 
 @app.get("/", response_model=HealthResponse)
@@ -0,0 +1,2 @@
+# Root conftest: lets plain `pytest` import the top-level packages
+# (utils, services, …) the way `python -m pytest` already does.
@@ -1,13 +1,12 @@
 from __future__ import annotations
 
-import json
 from collections import defaultdict
 from pathlib import Path
 from typing import Dict, List, Set, Tuple
 
-from utils.arabic import normalize
-from utils.paths import MORPHOLOGY_FILE
-from services.retrievers.morphology_retriever import _variants, _concat
+from utils.arabic import normalize, normalize_many
+from utils.paths import MORPHOLOGY_FILE, iter_jsonl_mmap
+from services.retrievers.morphology_retriever import _variants, _concat, _token_index, _with_shadda_free
 from services.extractors.quranic_word_extractor import extract_word
 
 
@@ -30,6 +29,7 @@ class RootAyahExtraction:
     # Shared in-memory caches (populated once per process)
     # ------------------------------------------------------------------
     _VERSE_CACHE: Dict[Tuple[int, int], Dict[int, List[Dict]]] = {}
+    _SURFACE_NORM: Dict[Tuple[int, int, int], str] = {}   # normalised word surface
     _FILE_LOADED: bool = False
 
     # ------------------------------------------------------------------
@@ -55,17 +55,20 @@ class RootAyahExtraction:
                 raise ValueError("❓ لم أستطع تحديد الكلمة أو الجذر المطلوب من السؤال.")
 
         q_norm = normalize(query_word)
+        # query-side variants are constant for the whole scan
+        q_forms = _with_shadda_free(_variants(q_norm))
 
         if not self.__class__._FILE_LOADED:
             self._load_morphology()
 
         matched: Set[Tuple[int, int]] = set()
 
+        surface_norms = self.__class__._SURFACE_NORM
         for (s, a), words in self.__class__._VERSE_CACHE.items():
             if surah_filter is not None and s != surah_filter:
                 continue
-            for toks in words.values():
-                if self._word_matches(q_norm, toks):
+            for w, toks in words.items():
+                if self._word_matches(q_norm, q_forms, toks, surface_norms[(s, a, w)]):
                     matched.add((s, a))
                     break
 
@@ -83,33 +86,43 @@ class RootAyahExtraction:
             raise FileNotFoundError(f"Morphology file not found: {self._morph_path}")
 
         verse_map: Dict[Tuple[int, int], Dict[int, List[Dict]]] = defaultdict(lambda: defaultdict(list))
-        with self._morph_path.open(encoding="utf-8") as fh:
-            for line in fh:
-                tok = json.loads(line)
-                key = (int(tok["surah"]), int(tok["ayah"]))
-                verse_map[key][int(tok["word_index"])].append(tok)
+        for tok in iter_jsonl_mmap(self._morph_path):
+            key = (int(tok["surah"]), int(tok["ayah"]))
+            verse_map[key][int(tok["word_index"])].append(tok)
 
         # Smart cast to plain dicts for smaller memory & faster lookups
         self.__class__._VERSE_CACHE = {k: dict(v) for k, v in verse_map.items()}
+
+        # Sort every word's tokens once and normalise its surface up front,
+        # so the per-query scan neither sorts nor normalises.
+        word_keys: List[Tuple[int, int, int]] = []
+        surfaces: List[str] = []
+        for (s, a), words in self.__class__._VERSE_CACHE.items():
+            for w, toks in words.items():
+                toks.sort(key=_token_index)
+                word_keys.append((s, a, w))
+                surfaces.append("".join(t["token"] for t in toks))
+        self.__class__._SURFACE_NORM = dict(zip(word_keys, normalize_many(surfaces)))
         self.__class__._FILE_LOADED = True
 
     # --------------------------------------------------------------
-    def _word_matches(self, q_norm: str, tokens: List[Dict]) -> bool:
-        # Helper to add **shadda-free** versions of every string in the set
-        def _with_shadda_free(variants: set[str]) -> set[str]:
-            return variants | {v.replace("ّ", "") for v in variants}
+    def _word_matches(
+        self, q_norm: str, q_forms: Set[str], tokens: List[Dict], surface_norm: str
+    ) -> bool:
+        """*q_forms* is ``_with_shadda_free(_variants(q_norm))``, computed
+        once per query by the caller; *surface_norm* is the word's
+        normalised surface, precomputed at load."""
+        q_bare = q_norm.replace("ّ", "")
 
         # 1) lemma equality (ignore shadda differences)
         for tok in tokens:
             lemma = tok.get("lemma") or ""
             if lemma:
                 lem_norm = normalize(lemma)
-                if lem_norm == q_norm or lem_norm.replace("ّ", "") == q_norm.replace("ّ", ""):
+                if lem_norm == q_norm or lem_norm.replace("ّ", "") == q_bare:
                     return True
 
         # 2) surface variant intersection (shadda-robust)
-        surface_norm = normalize(_concat(tokens))
-
         # Prefer the first token that actually carries a root for initial radical
         root_initial = ""
         for tok in tokens:
@@ -118,7 +131,6 @@ class RootAyahExtraction:
                 root_initial = rt[:1]
                 break
 
-        q_forms = _with_shadda_free(_variants(q_norm))
         s_forms = _with_shadda_free(_variants(surface_norm, root_initial))
 
         if q_forms & s_forms:
@@ -129,7 +141,7 @@ class RootAyahExtraction:
             root = tok.get("root") or ""
             if root:
                 r_norm = normalize(root)
-                if r_norm == q_norm or r_norm.replace("ّ", "") == q_norm.replace("ّ", ""):
+                if r_norm == q_norm or r_norm.replace("ّ", "") == q_bare:
                     return True
 
         return False
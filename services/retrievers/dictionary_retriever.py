@@ -1,25 +1,21 @@
 # services/retrievers/dictionary_retriever.py
-import json
-from pathlib import Path
 from typing import Dict, Optional, Tuple
 
 from utils.arabic import normalize
-from utils.paths import DICTIONARY_FILE
+from utils.paths import DICTIONARY_FILE_STR, iter_jsonl_mmap
 
 
 def lookup_definition(word: str) -> Tuple[Optional[Dict], str]:
     """
     Load a plain Arabic dictionary dump (JSONL) and return the entry.
     """
-    f = Path(DICTIONARY_FILE)
-    if not f.exists():
-        return None, f"❗ Dictionary file not found: {f}"
-
+    f = DICTIONARY_FILE_STR
     w_norm = normalize(word)
-    with f.open(encoding="utf-8") as fh:
-        for line in fh:
-            entry = json.loads(line)
+    try:  # opening the file doubles as the existence check
+        for entry in iter_jsonl_mmap(f):
             if normalize(entry.get("word", "")) == w_norm:
                 return entry, f"✅ Definition for '{word}' found."
+    except FileNotFoundError:
+        return None, f"❗ Dictionary file not found: {f}"
 
-    return None, f"Definition for '{word}' not found."
\ No newline at end of file
+    return None, f"Definition for '{word}' not found."
@@ -14,26 +14,42 @@ Stage-3  ·  Retrieval dispatcher
 
 from __future__ import annotations
 
-import json
+import functools
+import logging
 import re
-from pathlib import Path
+from collections import defaultdict
+from dataclasses import dataclass
 from typing import Dict, List, Tuple, Optional
 import unicodedata
 import os
 import numpy as np
 
-from utils.arabic import normalize
-from utils.paths import MORPHOLOGY_FILE, ROOT_ANALYSIS_FILE, DICTIONARY_FILE
+from utils.arabic import normalize, normalize_many
+from utils.paths import MORPHOLOGY_FILE_STR, ROOT_ANALYSIS_FILE_STR, iter_jsonl_mmap
 
 from .morphology_retriever import (
     smart_exact_match,
     _variants as _m_variants,
-    _concat as _m_concat,
+    _token_index as _m_token_index,
+    _with_shadda_free,
 )
-from .root_retriever import root_lookup_combined
+from .root_retriever import root_lookup_combined, _normalize_root
 from .dictionary_retriever import lookup_definition
 
 
+logger = logging.getLogger(__name__)
+
+
+def _strip_harakat(text: str) -> str:
+    """Drop the short-vowel harakāt (fatḥa, ḍamma, kasra, sukūn).  On short
+    tokens four C-level replace() calls beat a dict-table translate()."""
+    return text.replace("\u064e", "").replace("\u064f", "").replace("\u0650", "").replace("\u0652", "")
+
+
+# Hamza-bearing alif forms a root may start with (single-codepoint test)
+_HAMZA_PREFIX = frozenset(("أ", "إ", "آ"))
+
+
 # --------------------------------------------------------------------------- #
 # 1. Light-weight helpers                                                     #
 # --------------------------------------------------------------------------- #
@@ -53,14 +69,14 @@ def lemma_match(word: str) -> Tuple[Optional[List[Dict]], str]:
 
     # 1️⃣  Primary – strict lemma/surface matching
     tokens, note = smart_exact_match(word)
-    print(f"🔍 [DEBUG] lemma_match primary result: {tokens}")
+    logger.debug("🔍 lemma_match primary result: %s", tokens)
 
     if tokens:
         return tokens, note
 
     # 2️⃣  Fallback – treat the input as a **root**
     root_tokens, root_note = root_match(word)
-    print(f"🔍 [DEBUG] lemma_match fallback (root_match) result: {root_tokens}")
+    logger.debug("🔍 lemma_match fallback (root_match) result: %s", root_tokens)
 
     if root_tokens:
         combined_note = (
@@ -96,42 +112,23 @@ def lemma_match_surah_filter(word: str, surah: str | None = None):
     # Normalise the query once
     q_norm = normalize(word)
 
-    # Prepare caches (load once, very small file)
-    tokens_all = _all_morph_tokens()
-
-    # 1️⃣  Group tokens into complete Qurʼānic words ---------------------
-    grouped: dict[tuple, list] = {}
-    for tok in tokens_all:
-        if surah_num is not None and int(tok["surah"]) != surah_num:
-            continue  # early discard if outside requested sūrah
-        key = (tok["surah"], tok["ayah"], tok["word_index"])
-        grouped.setdefault(key, []).append(tok)
+    # Query variants depend only on *word* – build them once per call; the
+    # per-word lemma / surface variants are precomputed (see _morph_groups)
+    q_forms = _with_shadda_free(_m_variants(q_norm))
 
     matches: list[dict] = []
 
-    # 2️⃣  Iterate groups, apply lemma & surface-variant comparison ------
-    for key, toks in grouped.items():
-        lemma = toks[0].get("lemma", "")
-        if lemma and normalize(lemma) == q_norm:
-            matches.extend(toks)
+    # 1️⃣  Iterate prebuilt Qurʼānic words, apply lemma & surface-variant
+    #     comparison (restricted to the requested sūrah if any) -----------
+    for group in _morph_groups(surah_num):
+        if group.lemma_norm == q_norm:
+            matches.extend(group.tokens)
             continue
 
-        surface = _m_concat(toks)
-        surface_norm = normalize(surface)
-
-        root_initial = (toks[0].get("root") or "")[:1] if toks[0].get("root") else None
+        if not q_forms.isdisjoint(group.surface_variants):
+            matches.extend(group.tokens)
 
-        # Build variant sets and add *additional* versions with shadda removed
-        def _with_shadda_free(variants: set[str]) -> set[str]:
-            return variants | {v.replace("ّ", "") for v in variants}
-
-        q_forms   = _with_shadda_free(_m_variants(q_norm))
-        s_forms   = _with_shadda_free(_m_variants(surface_norm, root_initial))
-
-        if q_forms & s_forms:
-            matches.extend(toks)
-
-    # 3️⃣  If we found word-level matches, return them -------------------
+    # 2️⃣  If we found word-level matches, return them -------------------
     if matches:
         note = (
             f"✅ Found {len(matches)} tokens for ‘{word}’"
@@ -139,7 +136,7 @@ def lemma_match_surah_filter(word: str, surah: str | None = None):
         )
         return matches, note
 
-    # 4️⃣  Fallback – treat the query as a root --------------------------
+    # 3️⃣  Fallback – treat the query as a root --------------------------
     root_tokens, root_note = root_match(word)
     if root_tokens:
         if surah_num is not None:
@@ -150,7 +147,7 @@ def lemma_match_surah_filter(word: str, surah: str | None = None):
             )
             return root_tokens, note
 
-    # 5️⃣  Nothing found --------------------------------------------------
+    # 4️⃣  Nothing found --------------------------------------------------
     scope = f" in S{surah_num}" if surah_num else " in corpus"
     return None, f"❌ ‘{word}’ not found{scope}."
 
@@ -158,11 +155,69 @@ def lemma_match_surah_filter(word: str, surah: str | None = None):
 def _all_morph_tokens() -> List[Dict]:
     """Read quran_morphology.jsonl once (very small ≈ 100 KB gzipped)."""
     if not hasattr(_all_morph_tokens, "_cache"):
-        with open(MORPHOLOGY_FILE, encoding="utf-8") as fh:
-            _all_morph_tokens._cache = [json.loads(x) for x in fh]
+        _all_morph_tokens._cache = list(iter_jsonl_mmap(MORPHOLOGY_FILE_STR))
     return _all_morph_tokens._cache
 
 
+@dataclass(slots=True)
+class GroupRecord:
+    """One complete Qurʼānic word (all tokens sharing surah/ayah/word_index)
+    together with the query-independent fields the matchers compare against."""
+
+    key: Tuple[int, int, int]
+    tokens: List[Dict]
+    lemma_norm: Optional[str]          # None when the word carries no lemma
+    surface_variants: frozenset
+
+
+def _morph_groups(surah: int | None = None) -> List[GroupRecord]:
+    """Return the prebuilt word groups, optionally only those of *surah*.
+
+    Grouping, lemma normalisation and the shadda-robust surface variants
+    depend only on the corpus, never on the query, so they are computed
+    once per process instead of once per query.
+    """
+    if not hasattr(_morph_groups, "_GROUPS"):
+        grouped: Dict[tuple, List[Dict]] = defaultdict(list)
+        for tok in _all_morph_tokens():
+            grouped[(tok["surah"], tok["ayah"], tok["word_index"])].append(tok)
+
+        for toks in grouped.values():
+            toks.sort(key=_m_token_index)  # once; the surface join needs no sort
+        # bulk passes – also keeps normalize()'s cache for query-time strings
+        lemma_norms = normalize_many(toks[0].get("lemma") for toks in grouped.values())
+        surface_norms = normalize_many(
+            "".join(t["token"] for t in toks) for toks in grouped.values()
+        )
+
+        groups: List[GroupRecord] = []
+        by_surah: Dict[int, List[GroupRecord]] = defaultdict(list)
+        for (key, toks), lemma_norm, surface_norm in zip(
+            grouped.items(), lemma_norms, surface_norms
+        ):
+            lemma = toks[0].get("lemma", "")
+            root_initial = (toks[0].get("root") or "")[:1] if toks[0].get("root") else None
+            group = GroupRecord(
+                key=key,
+                tokens=toks,
+                lemma_norm=lemma_norm if lemma else None,
+                surface_variants=frozenset(
+                    _with_shadda_free(_m_variants(surface_norm, root_initial))
+                ),
+            )
+            groups.append(group)
+            by_surah[int(key[0])].append(group)
+
+        # _GROUPS is the init guard – publish it last so concurrent callers
+        # never see it without _BY_SURAH
+        _morph_groups._BY_SURAH = dict(by_surah)
+        _morph_groups._GROUPS = groups
+
+    if surah is None:
+        return _morph_groups._GROUPS
+    return _morph_groups._BY_SURAH.get(surah, [])
+
+
 def root_match(root_or_word: str) -> Tuple[Optional[List[Dict]], str]:
     """
     • If caller passes a *word*, derive its root via smart_exact_match.
@@ -177,8 +232,9 @@ def root_match(root_or_word: str) -> Tuple[Optional[List[Dict]], str]:
         root = root_or_word
 
     # For hamza roots, we need to check both normalized and unnormalized forms
-    if root.startswith(("أ", "إ", "آ")):
-        matches = [t for t in _all_morph_tokens() if t["root"] == root or t["root"] == normalize(root)]
+    if root[:1] in _HAMZA_PREFIX:
+        root_norm = normalize(root)
+        matches = [t for t in _all_morph_tokens() if t["root"] == root or t["root"] == root_norm]
     else:
         matches = [t for t in _all_morph_tokens() if t["root"] == root]
 
@@ -195,6 +251,111 @@ def etymology_lookup(root: str) -> Tuple[str, str]:
     return "→ (stub) brief etymology", "ℹ️  etymology_lookup placeholder"
 
 
+@dataclass(frozen=True)
+class _TopicState:
+    """Static corpus + embeddings backing ``topic_expansion`` (built once)."""
+
+    root_strs: List[str]
+    raw_rows: List[Dict]
+    docs_str: List[str]
+    vecs: np.ndarray
+    embedder: object
+    root_to_idx: Dict[str, int]       # first row index per root
+    root_to_row: Dict[str, Dict]      # last row per root (as before)
+
+
+@functools.cache
+def _topic_state() -> _TopicState:
+    """Load `root_analysis.jsonl` and its embeddings once per process.
+
+    ``functools.cache`` does not memoise exceptions, so a failed first
+    initialisation is simply retried on the next call.
+    """
+    from utils.embedding_utils import get_embeddings
+
+    logger.info("🔄 [topic_expansion] Initialising corpus & embeddings …")
+
+    # Load ⇢ lists --------------------------------------------------
+    roots: list[str] = []
+    raw_rows: list[dict] = []
+    docs: list[str] = []
+    docs_str: list[str] = []
+    for j in iter_jsonl_mmap(ROOT_ANALYSIS_FILE_STR):
+        r = j.get("root_stripped") or j.get("root") or ""
+        gloss = j.get("مفردات لسان العرب", "")
+        syns = j.get("المرادفات", "")
+        doc_text = f"{r} – {gloss} {syns}"
+        docs.append(doc_text)
+        docs_str.append(doc_text)
+        roots.append(r)
+        raw_rows.append(j)
+
+    # Compute embeddings once -------------------------------------
+    # (one cache file per vector space: model, prefixes and EMBED_DIM)
+    embedder = get_embeddings()
+    cache_name = embedder.cache_id.replace("/", "_")
+    cache_file = os.path.join(os.path.dirname(ROOT_ANALYSIS_FILE_STR), f"root_analysis_emb_{cache_name}.npy")
+
+    if os.path.exists(cache_file):
+        logger.info("📂 [topic_expansion] Loading pre-computed embeddings…")
+        # Memory-mapped so the size check below reads only the header
+        vecs_np = np.load(cache_file, mmap_mode="r")
+        if vecs_np.shape[0] != len(docs):
+            logger.warning("⚠️  Embed cache size mismatch. Re-computing …")
+            vecs_np = None
+        else:
+            # Cache is stored as float16 – promote once so the per-query
+            # product runs through BLAS.  This copies the matrix into
+            # private memory (~2.5 MB for e5), so worker processes do not
+            # share it; only legacy float32 caches stay backed by the
+            # shared page cache.
+            vecs_np = np.asarray(vecs_np, dtype=np.float32)
+    else:
+        vecs_np = None
+
+    if vecs_np is None:
+        logger.info("🧮 [topic_expansion] Computing embeddings for corpus …")
+        # float32 regardless of EMBEDDING_PRECISION: this cache is also the
+        # calibration set of the int8 quantiser
+        vecs_np = np.asarray(embedder.embed_documents(docs, precision="float32"), dtype=np.float32)
+        # L2-normalise for cosine similarity via dot product
+        norms = np.linalg.norm(vecs_np, axis=1, keepdims=True) + 1e-9
+        vecs_np = vecs_np / norms
+        try:
+            # float16 on disk halves the file; cosine ranking is insensitive
+            # to the rounding of unit vectors at this scale
+            np.save(cache_file, vecs_np.astype(np.float16))
+            logger.info("💾 [topic_expansion] Saved embeddings cache → %s", cache_file)
+        except Exception as _err:
+            logger.warning("⚠️  Could not save embed cache: %s", _err)
+
+    # EMBEDDING_PRECISION=float16 / int8 keeps the in-memory matrix smaller
+    if embedder.precision == "int8":
+        embedder.calibrate(vecs_np)
+    vecs_np = embedder.quantise(vecs_np)
+
+    root_to_idx: Dict[str, int] = {}
+    for i, r in enumerate(roots):
+        root_to_idx.setdefault(r, i)
+
+    logger.info("✅ [topic_expansion] Loaded %d rows & cached embeddings.", len(roots))
+    return _TopicState(
+        root_strs=roots,
+        raw_rows=raw_rows,
+        docs_str=docs_str,
+        vecs=vecs_np,
+        embedder=embedder,
+        root_to_idx=root_to_idx,
+        root_to_row=dict(zip(roots, raw_rows)),
+    )
+
+
+def warmup_topic_expansion() -> None:
+    """Load (or, on a fresh deploy, embed) the topic_expansion corpus now,
+    e.g. at app start-up, so the first user request does not pay for it."""
+    _topic_state()
+
+
 def topic_expansion(topic: str) -> Tuple[str, str]:
     """Return a *comma-separated* list of the most relevant Qurʼānic roots
     to the given **Arabic** *topic*.
@@ -203,112 +364,52 @@ def topic_expansion(topic: str) -> Tuple[str, str]:
     • Uses the existing `root_analysis.jsonl` resource as a miniature corpus
       where each *entry* (≈ 600) is treated as a document whose semantic
       content is the explanatory gloss + synonyms.
-    • Embeddings: identical to the rest of the project –
-      `intfloat/multilingual-e5-large` via ``utils.embedding_utils.get_embeddings``.
+    • Embeddings: identical to the rest of the project – the model picked by
+      ``utils.embedding_utils.get_embeddings`` (potion-multilingual-128M on
+      CPU, multilingual-e5-large on CUDA).
     • Vector backend: all-in-memory NumPy – no external DB – because the corpus
       is tiny so start-up latency is negligible and we avoid an extra Chroma
       dependency here.
     • The heavy lifting (loading + embedding the 600 docs) is performed **once**
-      per interpreter session and cached on the function object to keep
-      subsequent calls < 10 ms.
+      per interpreter session by ``_topic_state()`` to keep subsequent
+      calls < 10 ms.
     The function gracefully degrades: if embedding fails for any reason, we
     fall back to an empty result and return a diagnostic note.
     """
     try:
-        # ─── 1. Lazy-initialise static corpus & embeddings ───────────────
-        if not hasattr(topic_expansion, "_ROOT_STRS"):
-            from utils.paths import ROOT_ANALYSIS_FILE
-            from utils.embedding_utils import get_embeddings
-            import json, numpy as np
-
-            print("🔄 [topic_expansion] Initialising corpus & embeddings …")
-
-            # Load ⇢ lists --------------------------------------------------
-            roots: list[str] = []
-            raw_rows: list[dict] = []
-            docs: list[str] = []
-            docs_str: list[str] = []
-            with open(ROOT_ANALYSIS_FILE, encoding="utf-8") as fh:
-                for j in map(json.loads, fh):
-                    r = j.get("root_stripped") or j.get("root") or ""
-                    gloss = j.get("مفردات لسان العرب", "")
-                    syns = j.get("المرادفات", "")
-                    doc_text = f"{r} – {gloss} {syns}"
-                    docs.append(doc_text)
-                    docs_str.append(doc_text)
-                    roots.append(r)
-                    raw_rows.append(j)
-
-            # Compute embeddings once -------------------------------------
-            cache_name = os.getenv("EMBEDDING_MODEL_NAME", "intfloat/multilingual-e5-large").replace("/", "_")
-            cache_file = os.path.join(Path(ROOT_ANALYSIS_FILE).parent, f"root_analysis_emb_{cache_name}.npy")
-
-            if os.path.exists(cache_file):
-                print("📂 [topic_expansion] Loading pre-computed embeddings…")
-                vecs_np = np.load(cache_file)
-                if vecs_np.shape[0] != len(docs):
-                    print("⚠️  Embed cache size mismatch. Re-computing …")
-                    vecs_np = None
-            else:
-                vecs_np = None
-
-            if vecs_np is None:
-                print("🧮 [topic_expansion] Computing embeddings for corpus …")
-                embedder = get_embeddings()
-                vecs = embedder.embed_documents(docs)  # List[List[float]]
-                vecs_np = np.array(vecs, dtype="float32")
-                # L2-normalise for cosine similarity via dot product
-                norms = np.linalg.norm(vecs_np, axis=1, keepdims=True) + 1e-9
-                vecs_np = vecs_np / norms
-                try:
-                    np.save(cache_file, vecs_np)
-                    print(f"💾 [topic_expansion] Saved embeddings cache → {cache_file}")
-                except Exception as _err:
-                    print(f"⚠️  Could not save embed cache: {_err}")
-            else:
-                embedder = get_embeddings()  # ensure loaded for query
-
-            # Cache on the function object
-            topic_expansion._ROOT_STRS = roots
-            topic_expansion._RAW_ROWS = raw_rows
-            topic_expansion._DOCS_STR = docs_str
-            topic_expansion._VECS = vecs_np
-            topic_expansion._EMBED = embedder
-            topic_expansion._NP = np
-
-            print(f"✅ [topic_expansion] Loaded {len(roots)} rows & cached embeddings.")
+        # ─── 1. Lazy-initialised static corpus & embeddings ──────────────
+        state = _topic_state()
 
         # ─── 2. Embed the query topic text ───────────────────────────────
-        vec_q = topic_expansion._EMBED.embed_query(topic)
-        print(f"🔍 [topic_expansion] Embedded query ‘{topic}’. Searching top matches…")
-        np_mod = topic_expansion._NP
-        q_vec = np_mod.array(vec_q, dtype="float32")
-        q_vec = q_vec / (np_mod.linalg.norm(q_vec) + 1e-9)
-
-        # ─── 3. Similarity ranking (dot = cosine) ────────────────────────
-        sims = topic_expansion._VECS @ q_vec
+        vec_q = state.embedder.embed_query(topic)
+        logger.debug("🔍 [topic_expansion] Embedded query ‘%s’. Searching top matches…", topic)
+        if vec_q.dtype == np.int8:
+            # ─── 3. Similarity ranking (scale-weighted int8 dot) ─────────
+            sims = state.embedder.int8_scores(state.vecs, vec_q)
+        else:
+            q_vec = np.asarray(vec_q, dtype=state.vecs.dtype)
+            q_vec = q_vec / (np.linalg.norm(q_vec) + 1e-9)
+
+            # ─── 3. Similarity ranking (dot = cosine) ────────────────────
+            sims = state.vecs @ q_vec
         top_idx = sims.argsort()[-9:][::-1]  # top-9 highest → descending
 
-        roots_ranked = [topic_expansion._ROOT_STRS[i] for i in top_idx]
+        roots_ranked = [state.root_strs[i] for i in top_idx]
         # Deduplicate while preserving order if duplicates somehow arise
         seen = set()
         unique_roots = [r for r in roots_ranked if not (r in seen or seen.add(r))]
 
         # Gather full rows for extra context ---------------------------------
         rows: list[dict] = []
-        if not hasattr(topic_expansion, "_ROWS_CACHE"):
-            # Build cache mapping root→row to avoid re-reading file
-            topic_expansion._ROWS_CACHE = {
-                r: row for r, row in zip(topic_expansion._ROOT_STRS, topic_expansion._RAW_ROWS)
-            }
         for r in unique_roots[:9]:
-            row = topic_expansion._ROWS_CACHE.get(r)
+            row = state.root_to_row.get(r)
             if row:
                 rows.append(row)
 
-        rows_text = [topic_expansion._DOCS_STR[topic_expansion._ROOT_STRS.index(r)] for r in unique_roots[:9]]
+        rows_text = [state.docs_str[state.root_to_idx[r]] for r in unique_roots[:9]]
 
-        print("🔝 [topic_expansion] Top 5 roots:", ", ".join(unique_roots[:5]))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🔝 [topic_expansion] Top 5 roots: %s", ", ".join(unique_roots[:5]))
 
         data_out = {
             "root_list": unique_roots[:9],
@@ -352,42 +453,65 @@ def _ayahs_by_root_exact(root: str, max_n: int = 3) -> List[str]:
     """Return up to *max_n* formatted ayāt containing tokens whose **root**
     matches *root* exactly (ignores surface/lemma to avoid pronoun collision)."""
     if not hasattr(_ayahs_by_root_exact, "_VERSE_CACHE"):
-        # Build verse-level cache once using existing morphology loader
-        _ayahs_by_root_exact._TOKENS = _all_morph_tokens()
-        # group tokens by (surah, ayah)
-        _verse_map: Dict[Tuple[int,int], List[Dict]] = {}
-        for tok in _ayahs_by_root_exact._TOKENS:
-            key = (int(tok["surah"]), int(tok["ayah"]))
-            _verse_map.setdefault(key, []).append(tok)
+        # Build verse-level cache once from the prebuilt word groups
+        _verse_map: Dict[Tuple[int,int], List[Dict]] = defaultdict(list)
+        for group in _morph_groups():
+            s, a, _ = group.key
+            _verse_map[(int(s), int(a))].extend(group.tokens)
         _ayahs_by_root_exact._VERSE_MAP = _verse_map
+        # Inverted index: normalised root → verses containing it (mushaf
+        # order).  Kept off the token dicts so nothing leaks into the prompt
+        # context; tokens without a root are skipped.
+        _root_verses: Dict[str, List[Tuple[int,int]]] = defaultdict(list)
+        for key, toks in _verse_map.items():
+            for r_norm in dict.fromkeys(normalize(tok["root"]) for tok in toks if tok.get("root")):
+                _root_verses[r_norm].append(key)
+        _ayahs_by_root_exact._ROOT_VERSES = dict(_root_verses)
         _ayahs_by_root_exact._VERSE_CACHE = True
 
-    root_norm = normalize(root)
-    matches: List[Tuple[int,int]] = []
-    for s,a in _ayahs_by_root_exact._VERSE_MAP:
-        for tok in _ayahs_by_root_exact._VERSE_MAP[(s,a)]:
-            tok_root = tok.get("root")
-            if tok_root and normalize(tok_root) == root_norm:
-                matches.append((s,a))
-                break
-        if len(matches) >= max_n:
-            break
-
-    # Build text using RootAyahExtraction helper for consistency
-    if matches:
+    # One dict lookup instead of a full corpus walk per root
+    matches: List[Tuple[int,int]] = _ayahs_by_root_exact._ROOT_VERSES.get(normalize(root), [])[:max_n]
+
+    return [f"سورة {s} آية {a} – {_verse_text(s, a)}" for s,a in matches]
+
+
+def _verse_text(surah: int, ayah: int) -> str:
+    """Surface text of one verse, built once per (surah, ayah) and memoised."""
+    if not hasattr(_verse_text, "_VERSE_TEXT"):
+        _verse_text._VERSE_TEXT = {}
+    text = _verse_text._VERSE_TEXT.get((surah, ayah))
+    if text is None:
+        # Build text using RootAyahExtraction helper for consistency
         from services.extractors.root_ayah_extraction import RootAyahExtraction
-        extractor = RootAyahExtraction()
-        verses = []
-        for s,a in matches:
-            verse_toks = _ayahs_by_root_exact._VERSE_MAP[(s,a)]
-            # group tokens by word_index to reuse existing builder
-            grouped: Dict[int, List[Dict]] = {}
-            for tok in verse_toks:
-                grouped.setdefault(int(tok["word_index"]), []).append(tok)
-            text = RootAyahExtraction._build_verse_text(grouped)  # type: ignore
-            verses.append(f"سورة {s} آية {a} – {text}")
-        return verses
-    return []
+        # group tokens by word_index to reuse existing builder
+        grouped: Dict[int, List[Dict]] = {}
+        for tok in _ayahs_by_root_exact._VERSE_MAP[(surah, ayah)]:
+            grouped.setdefault(int(tok["word_index"]), []).append(tok)
+        text = RootAyahExtraction._build_verse_text(grouped)  # type: ignore
+        _verse_text._VERSE_TEXT[(surah, ayah)] = text
+    return text
+
+
+def _find_target_token(tokens: List[Dict], target_normalized: str) -> Optional[Dict]:
+    """Shared target-token search for the root-extraction paths.
+
+    The token at surah, ayah and word_index (S37:A140:W2) wins; otherwise
+    the first token whose harakāt-stripped token or lemma equals
+    *target_normalized*.  One pass: returns on the location hit, and stops
+    comparing text once a match is held.  Returns ``None`` when nothing
+    matches.
+    """
+    text_match: Optional[Dict] = None
+    for tok in tokens:
+        if tok.get("surah") == 37 and tok.get("ayah") == 140 and tok.get("word_index") == 2:
+            return tok
+        if text_match is None and (
+            # Safely handle cases where 'token' or 'lemma' might be None
+            _strip_harakat(tok.get("token") or "") == target_normalized
+            or _strip_harakat(tok.get("lemma") or "") == target_normalized
+        ):
+            text_match = tok
+    return text_match
 
 
 # --------------------------------------------------------------------------- #
@@ -498,16 +622,15 @@ def dispatch_retrieval(question_type: str, target: str, surah: int | None = None
                 pretty_refs = [f"سورة {s} آية {a}" for s, a, _ in sorted(word_keys)]
                 ctx["occurrence_refs"] = occ_refs  # make available to prompt
                 ctx["occurrence_refs_pretty"] = pretty_refs
-                refs_list = ", ".join(occ_refs)
-                print(f"🔍 [DEBUG] Occurrences ({len(occ_refs)} words): {refs_list}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("🔍 Occurrences (%d words): %s", len(occ_refs), ", ".join(occ_refs))
             elif step["postprocess"] == "extract_root" and morph_cache:
                 # Attempt to extract the first available root from cached tokens
                 root_str = next((t.get("root") for t in morph_cache if t.get("root")), None)
                 if root_str is None:
                     # Try a secondary lookup using smart_exact_match (may return tokens with root filled)
                     try:
-                        from .morphology_retriever import smart_exact_match as _smart_match
-                        _toks, _note = _smart_match(target)
+                        _toks, _note = smart_exact_match(target)
                         if _toks and _toks[0].get("root"):
                             root_str = _toks[0]["root"]
                             ctx["root_note"] = f"✅ Extracted root «{root_str}» via secondary lookup."
@@ -522,14 +645,16 @@ def dispatch_retrieval(question_type: str, target: str, surah: int | None = None
 
                 ctx["root"] = root_str
             elif step["postprocess"] == "attach_sample_ayahs":
-                # Build a mapping {root: first_ayah_text}
+                # Build a mapping {root: [up to 3 formatted ayāt]}.  Each
+                # lookup is a dict hit on the prebuilt root → verses index,
+                # so the roots are simply resolved serially.
                 root_list_str = ctx.get("topic_expansion")
                 roots = []
                 if isinstance(root_list_str, dict):
                     roots = root_list_str.get("root_list", [])
                 elif isinstance(root_list_str, str) and root_list_str.strip():
                     roots = [r.strip() for r in root_list_str.split("،") if r.strip()]
-                samples: dict[str, str] = {}
+                samples: dict[str, list[str]] = {}
                 for r in roots:
                     try:
                         verses = _ayahs_by_root_exact(r, max_n=3)
@@ -542,7 +667,7 @@ def dispatch_retrieval(question_type: str, target: str, surah: int | None = None
             continue
 
         method_name = step["method"]
-        print(f"\n🔍 [] Executing method: {method_name}")
+        logger.debug("🔍 Executing method: %s", method_name)
         
         # Get the callable for this method
         method = CALLABLES[method_name]
@@ -575,30 +700,8 @@ def dispatch_retrieval(question_type: str, target: str, surah: int | None = None
             root_arg = None
             if morph_cache:   
                 # First try to find a token that matches our target word
-                target_token = None
-                target_normalized = target.replace("َ", "").replace("ُ", "").replace("ِ", "").replace("ْ", "")
-                
-                # Try to find the token by surah, ayah, and word_index first
-                for tok in morph_cache:
-                    if tok.get("surah") == 37 and tok.get("ayah") == 140 and tok.get("word_index") == 2:
-                        target_token = tok
-                        break
-                
-                # If not found by location, try normalized matching
-                if not target_token:
-                    for tok in morph_cache:
-                        # Safely handle cases where 'token' or 'lemma' might be None
-                        raw_token: str = tok.get("token") or ""
-                        raw_lemma: str = tok.get("lemma") or ""
-
-                        token_normalized = raw_token.replace("َ", "").replace("ُ", "").replace("ِ", "").replace("ْ", "")
-                        lemma_normalized = raw_lemma.replace("َ", "").replace("ُ", "").replace("ِ", "").replace("ْ", "")
-                        
-                        if token_normalized == target_normalized or lemma_normalized == target_normalized:
-                            target_token = tok
-                            print(f"🔍 [DEBUG] Found matching token!")
-                            break
-                
+                target_token = _find_target_token(morph_cache, _strip_harakat(target))
+
                 # If we found a matching token, use its root
                 if target_token:
                     root_field = target_token.get("root")
@@ -677,35 +780,14 @@ def _extract_root(self, target_word: str, tokens: List[Dict]) -> str:
     Prioritizes the target word's root if available.
     """
     # Always use the target word as root if it starts with hamza
-    if target_word.startswith(("أ", "إ", "آ")):
+    if target_word[:1] in _HAMZA_PREFIX:
         return target_word
     
-    # First try to find a token that matches our target word
-    target_token = None
-    target_normalized = self._normalize_arabic(target_word)
-    
-    # Try to find the token by surah, ayah, and word_index first
-    for tok in tokens:
-        if tok.get("surah") == 37 and tok.get("ayah") == 140 and tok.get("word_index") == 2:
-            target_token = tok
-            break
-    
-    # If not found by location, try normalized matching
-    if not target_token:
-        for tok in tokens:
-            # Safely handle cases where 'token' or 'lemma' might be None
-            raw_token: str = tok.get("token") or ""
-            raw_lemma: str = tok.get("lemma") or ""
-
-            token_normalized = raw_token.replace("َ", "").replace("ُ", "").replace("ِ", "").replace("ْ", "")
-            lemma_normalized = raw_lemma.replace("َ", "").replace("ُ", "").replace("ِ", "").replace("ْ", "")
-            
-            # Only match if the normalized forms are exactly equal
-            # This prevents partial matches within words (like سابق matching with ابق)
-            if token_normalized == target_normalized or lemma_normalized == target_normalized:
-                target_token = tok
-                break
-    
+    # First try to find a token that matches our target word.  Only exact
+    # normalized equality counts – this prevents partial matches within
+    # words (like سابق matching with ابق)
+    target_token = _find_target_token(tokens, self._normalize_arabic(target_word))
+
     # If we found a matching token, use its root
     if target_token and target_token.get("root"):
         return target_token["root"]
@@ -721,13 +803,5 @@ def _normalize_arabic(self, text: str) -> str:
     if not text:
         return ""
 
-    # Remove diacritics
-    text = text.replace("َ", "").replace("ُ", "").replace("ِ", "").replace("ْ", "")
-
-    # Normalize hamza forms to alif
-    text = text.replace("أ", "ا").replace("إ", "ا").replace("آ", "ا")
-
-    # Normalize other common variations
-    text = text.replace("ى", "ي").replace("ة", "ه")
-
-    return text
\ No newline at end of file
+    # Same fold as root_analysis lookups: diacritics, hamza forms, ى/ة
+    return _normalize_root(text)
\ No newline at end of file
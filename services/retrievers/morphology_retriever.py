@@ -16,12 +16,22 @@ without mutilating the underlying data.
 """
 from __future__ import annotations
 
-import json
+import functools
+import logging
+import os
+import pickle
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Set, Tuple
 
-from utils.arabic import normalize, strip_diacritics
-from utils.paths import MORPHOLOGY_FILE
+from utils.arabic import normalize, normalize_many, strip_diacritics
+from utils.paths import MORPHOLOGY_FILE, iter_jsonl_mmap, resolve_path
+
+try:  # optional: compact, C-backed storage for the variant index
+    import marisa_trie
+except ImportError:  # pragma: no cover – plain dict fallback
+    marisa_trie = None
+
+logger = logging.getLogger(__name__)
 
 
 # ── helper: load / group tokens into full Qurʾānic "words" ─────────────
@@ -29,70 +39,207 @@ def _group_key(tok: Dict) -> tuple:
     return tok["surah"], tok["ayah"], tok["word_index"]
 
 
+def _token_index(tok: Dict) -> int:
+    return tok["token_index"]
+
+
 def _concat(tokens: List[Dict]) -> str:
     """Concatenate raw tokens preserving order in the verse‐word."""
-    return "".join(t["token"] for t in sorted(tokens, key=lambda x: x["token_index"]))
+    return "".join(t["token"] for t in sorted(tokens, key=_token_index))
 
 
 # ── spelling-variant generator ─────────────────────────────────────────
-_PROCLITICS: Set[str] = {"ك", "ف", "ب", "ل", "س", "و"}  # keep و as *optional* only
+_PROCLITICS: FrozenSet[str] = frozenset("كفبلسو")  # keep و as *optional* only
 
 # Imperfect-verb prefixes that can follow the future particle «س»
-_IMPF_PREFIXES: Set[str] = {"أ", "إ", "آ", "ي", "ت", "ن"}
+_IMPF_PREFIXES: FrozenSet[str] = frozenset("أإآيتن")
 
-def _variants(word: str, root_initial: str | None = None) -> Set[str]:
+@functools.lru_cache(maxsize=16384)
+def _variants(word: str, root_initial: str | None = None) -> FrozenSet[str]:
     """
     Generate a small set of orthographic variants that differ by:
         • leading proclitic (one char from _PROCLITICS)
         • leading definite article «ال»
         • trailing case-seat «ا»
         • tanween (ً ٍ ٌ)
-    The word itself is always included.
+    The word itself is always included.  Memoised, hence the frozenset.
     """
     
     forms: Set[str] = {word}
-    
 
     # ── 1. optional removal of a *single* proclitic  ─────────────────
     # We apply tighter heuristics so that we never strip a letter that is
-    # actually the first radical of the root (e.g. «س» in «سابق»).
-    if len(word) > 3 and word[0] in _PROCLITICS:
-        # Skip if the letter seems to belong to the root itself
-        if root_initial and word[0] == root_initial:
-            pass  # do NOT remove – keeps integrity of root-initial
-        else:
-            # Special case «س+» : only future-particle when followed by an
-            # imperfect prefix.
-            if word[0] == "س":
-                if word[1] in _IMPF_PREFIXES:
-                    forms.add(word[1:])
-            else:
-                forms.add(word[1:])
-        
-
-    tmp = set(forms)  # snapshot before next rules
-
-    # remove definite article
-    for w in tmp:
-        if w.startswith("ال") and len(w) > 3:
+    # actually the first radical of the root (e.g. «س» in «سابق»).  «س+» is
+    # only the future particle when followed by an imperfect prefix.
+    if len(word) > 3 and word[0] in _PROCLITICS and word[0] != root_initial:
+        if word[0] != "س" or word[1] in _IMPF_PREFIXES:
+            forms.add(word[1:])
+
+    # ── 2. remove definite article (word / proclitic-less form only) ──
+    for w in tuple(forms):
+        if len(w) > 3 and w.startswith("ال"):
             forms.add(w[2:])
-            
 
-    # remove tanween and trailing alif
-    for w in list(forms):
-        # Remove tanween
+    # ── 3. remove tanween and trailing alif ───────────────────────────
+    for w in tuple(forms):
         if "ً" in w:
             forms.add(w.replace("ً", ""))
         if "ٍ" in w:
             forms.add(w.replace("ٍ", ""))
         if "ٌ" in w:
             forms.add(w.replace("ٌ", ""))
-        # Remove trailing alif
-        if w.endswith("ا") and len(w) > 3:
+        if len(w) > 3 and w.endswith("ا"):
             forms.add(w[:-1])
-        
 
-    return forms
+    return frozenset(forms)
+
+
+def _with_shadda_free(variants: FrozenSet[str]) -> FrozenSet[str]:
+    """Add **shadda-free** versions of every string in the set."""
+    return variants | {v.replace("ّ", "") for v in variants}
+
+
+# ── compact str → int map for the inverted variant index ──────────────
+class _TrieMap:
+    """Read-only ``str → int`` mapping backed by a marisa ``RecordTrie``.
+
+    Shared prefixes of the ~100k spelling variants are stored once in C,
+    which is several times smaller than the equivalent Python dict.
+    """
+
+    __slots__ = ("_trie",)
+
+    def __init__(self, mapping: Dict[str, int]) -> None:
+        self._trie = marisa_trie.RecordTrie("<I", ((k, (v,)) for k, v in mapping.items()))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._trie
+
+    def __getitem__(self, key: str) -> int:
+        return self._trie[key][0][0]
+
+
+def _compact(mapping: Dict[str, int]) -> Mapping[str, int]:
+    """Return a trie-backed view of *mapping* when marisa-trie is installed."""
+    return _TrieMap(mapping) if marisa_trie is not None else mapping
+
+
+# ── one-time index: (path, mtime) → per-word fields ───────────────────
+class _MorphIndex(NamedTuple):
+    """Query-independent fields of every Qurʾānic word.  ``keys`` and
+    ``groups`` are parallel lists (position *i* is the *i*-th word in file
+    order); the inverted maps give the first position of each normalised
+    lemma / root / surface variant, so a query is a few dict lookups."""
+
+    keys: List[tuple]                       # (surah, ayah, word_index)
+    groups: List[List[Dict]]                # raw tokens of the word
+    lemma_inverted: Dict[str, int]          # normalised lemma → first word
+    root_inverted: Dict[str, int]           # normalised root → first word
+    surface_inverted: Mapping[str, int]     # surface variant → first word
+
+
+_INDEX_CACHE: Dict[Tuple[Path, float], _MorphIndex] = {}
+
+# On-disk copy of the built index, written next to the JSONL.  Bump the
+# version whenever _MorphIndex, _variants or utils.arabic.normalize change.
+_INDEX_PICKLE_VERSION = 2
+
+
+def _index_pickle_path(path: Path) -> Path:
+    return path.with_name(path.name + ".idx.pickle")
+
+
+def _read_index_pickle(path: Path, st: os.stat_result) -> Optional[_MorphIndex]:
+    """Return the pickled index of *path* if it was built from this very
+    file version (same mtime and size) by compatible code, else None."""
+    try:
+        with _index_pickle_path(path).open("rb") as fh:
+            version, mtime_ns, size, index = pickle.load(fh)
+    except FileNotFoundError:
+        return None
+    except Exception as exc:  # truncated / written by incompatible code
+        logger.warning("Ignoring unreadable morphology index cache: %s", exc)
+        return None
+    if (version, mtime_ns, size) != (_INDEX_PICKLE_VERSION, st.st_mtime_ns, st.st_size):
+        return None
+    return index
+
+
+def _write_index_pickle(path: Path, st: os.stat_result, index: _MorphIndex) -> None:
+    """Best effort: a read-only data directory just means no disk cache."""
+    target = _index_pickle_path(path)
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    try:
+        with tmp.open("wb") as fh:
+            pickle.dump(
+                (_INDEX_PICKLE_VERSION, st.st_mtime_ns, st.st_size, index),
+                fh,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp, target)  # atomic: readers never see a partial file
+    except OSError as exc:
+        tmp.unlink(missing_ok=True)
+        logger.warning("Could not write morphology index cache %s: %s", target, exc)
+
+
+def _build_index(path: Path) -> _MorphIndex:
+    """Parse the JSONL and compute every per-word field (plain dicts)."""
+    token_groups: Dict[tuple, List[Dict]] = {}
+    for tok in iter_jsonl_mmap(path):
+        token_groups.setdefault(_group_key(tok), []).append(tok)
+
+    keys = list(token_groups)
+    groups = list(token_groups.values())
+    for toks in groups:  # once, so joining the surface needs no sort
+        toks.sort(key=_token_index)
+    heads = [toks[0] for toks in groups]
+
+    # normalise all lemmas / roots / whole-word surfaces in bulk passes
+    lemma_norms = normalize_many(h.get("lemma") for h in heads)
+    root_norms = normalize_many(h.get("root") for h in heads)
+    surface_norms = normalize_many("".join(t["token"] for t in toks) for toks in groups)
+
+    index = _MorphIndex(keys, groups, {}, {}, {})
+    for i, head in enumerate(heads):
+        root = head.get("root", "")
+        root_initial = root[:1] if root else None
+        if head.get("lemma", ""):
+            index.lemma_inverted.setdefault(lemma_norms[i], i)
+        if root:
+            index.root_inverted.setdefault(root_norms[i], i)
+        for v in _variants(surface_norms[i], root_initial):
+            index.surface_inverted.setdefault(v, i)
+    return index
+
+
+def _load_index(path: Path) -> _MorphIndex:
+    """Read the morphology JSONL once, group its tokens into Qurʾānic words
+    and precompute the normalised lemma / root and the surface variants.
+
+    Lemma, root and surface variants are stored inverted (value → position
+    of the first word producing it), so matching is a handful of lookups.
+
+    The result is cached per (path, mtime) so every later query works on
+    precomputed fields instead of a full file parse; editing the file
+    invalidates it.  It is also pickled next to the JSONL, so a fresh
+    process skips the parse as long as the file is unchanged.
+    """
+    st = path.stat()
+    cache_key = (path, st.st_mtime)
+    index = _INDEX_CACHE.get(cache_key)
+    if index is None:
+        index = _read_index_pickle(path, st)
+        if index is None:
+            index = _build_index(path)
+            _write_index_pickle(path, st, index)
+
+        index = index._replace(surface_inverted=_compact(index.surface_inverted))
+
+        # drop stale versions of the same file before caching the new one
+        for stale in [k for k in _INDEX_CACHE if k[0] == path]:
+            del _INDEX_CACHE[stale]
+        _INDEX_CACHE[cache_key] = index
+    return index
 
 
 # ── main public function ──────────────────────────────────────────────
@@ -108,59 +255,41 @@ def smart_exact_match(
       • final tanwīn seat «ا»
     Returns (token_list, note) or (None, error note)
     """
-    f = Path(morphology_path)
-    if not f.exists():
+    f = resolve_path(morphology_path)
+
+    # 2️⃣  per-word fields (parsed & normalised once, see _load_index); its
+    # mtime stat() doubles as the existence check
+    try:
+        index = _load_index(f)
+    except FileNotFoundError:
         return None, f"❗ morphology file not found: {f}"
 
     # Normalize the query word by removing diacritics
     q_norm = normalize(query_word)
 
-    # 2️⃣  read once, group tokens
-    token_groups: dict[tuple, list] = {}
-    with f.open(encoding="utf-8") as fh:
-        for line in fh:
-            tok = json.loads(line)
-            token_groups.setdefault(_group_key(tok), []).append(tok)
-
-    # 3️⃣  iterate groups, compare variants sets
-    for key, toks in token_groups.items():
-        # First check if the lemma matches (most strict)
-        lemma = toks[0].get("lemma", "")
-        if lemma:
-            lemma_norm = normalize(lemma)
-  
-            if lemma_norm == q_norm:
-                s, a, w = key
-                print(f"🔍 [DEBUG] Found exact lemma match: '{query_word}' in S{s}:A{a}, word_index={w}")
-                return toks, f"✅ Exact lemma match: S{s}:A{a}, word_index={w}"
-
-        # Then check if the surface form of the **whole Qurʾānic word** matches
-        # A Qurʾānic "word" may consist of multiple tokens (e.g.
-        # «أَبَانَا» → ["أَبَا", "نَا"]).  We therefore concatenate the tokens
-        # first and compare against the query word – after normalisation – using
-        # the spelling-variant helper.
-
-        surface = _concat(toks)
-        surface_norm = normalize(surface)
-
-        # Generate small variant sets for robust matching
-        query_forms   = _variants(q_norm)
-        root_initial  = (toks[0].get("root") or "")[:1] if toks[0].get("root") else None
-        surface_forms = _variants(surface_norm, root_initial)
-
-        if query_forms & surface_forms:
-            s, a, w = key
-            print(f"🔍 [DEBUG] Found surface match: '{query_word}' in S{s}:A{a}, word_index={w}")
-            return toks, f"✅ Surface match: S{s}:A{a}, word_index={w}"
-
-        # Finally, if surface matching failed, fall back to root comparison
-        root = toks[0].get("root", "")
-        if root:
-            root_norm = normalize(root)
-            if root_norm == q_norm:
-                s, a, w = key
-                print(f"🔍 [DEBUG] Found exact root match: '{query_word}' in S{s}:A{a}, word_index={w}")
-                return toks, f"✅ Exact root match: S{s}:A{a}, word_index={w}"
+    # First word matching on lemma, surface variants or root (file order)
+    n_words = len(index.keys)
+    lemma_hit = index.lemma_inverted.get(q_norm, n_words)
+    root_hit = index.root_inverted.get(q_norm, n_words)
+    surface_hit = min(
+        (index.surface_inverted[v] for v in _variants(q_norm) if v in index.surface_inverted),
+        default=n_words,
+    )
+    first = min(lemma_hit, surface_hit, root_hit)
+
+    # 3️⃣  within that word: lemma (most strict) → whole-word surface form
+    # (a word may consist of several tokens, e.g. «أَبَانَا» → ["أَبَا", "نَا"])
+    # → root
+    if first < n_words:
+        s, a, w = index.keys[first]
+        if first == lemma_hit:
+            logger.debug("🔍 Found exact lemma match: '%s' in S%s:A%s, word_index=%s", query_word, s, a, w)
+            return index.groups[first], f"✅ Exact lemma match: S{s}:A{a}, word_index={w}"
+        if first == surface_hit:
+            logger.debug("🔍 Found surface match: '%s' in S%s:A%s, word_index=%s", query_word, s, a, w)
+            return index.groups[first], f"✅ Surface match: S{s}:A{a}, word_index={w}"
+        logger.debug("🔍 Found exact root match: '%s' in S%s:A%s, word_index=%s", query_word, s, a, w)
+        return index.groups[first], f"✅ Exact root match: S{s}:A{a}, word_index={w}"
 
     # 4️⃣  not found
     return None, (
@@ -0,0 +1,46 @@
+"""int8 embeddings must rank like the float32 ones they were quantised from."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from utils.embedding_utils import Int8Quantiser
+
+
+def _corpus(n=600, d=1024, seed=0):
+    # Anisotropic unit vectors: per-dimension spread varies by ~e², with a
+    # shared mean direction, roughly like transformer sentence embeddings
+    rng = np.random.default_rng(seed)
+    scales = rng.lognormal(0.0, 1.0, d)
+    x = rng.normal(size=(n, d)) * scales + rng.normal(size=d) * 2 * scales
+    x /= np.linalg.norm(x, axis=1, keepdims=True)
+    return x.astype(np.float32), scales.astype(np.float32), rng
+
+
+def _top9_overlap(quantiser, corpus, queries):
+    matrix = quantiser.quantise(corpus)
+    overlap = []
+    for q in queries:
+        top_f = set(np.argsort(corpus @ q)[-9:])
+        top_i = set(np.argsort(quantiser.scores(matrix, quantiser.quantise(q)))[-9:])
+        overlap.append(len(top_f & top_i) / 9)
+    return float(np.mean(overlap))
+
+
+def test_int8_top9_matches_float32_on_corpus_rows():
+    corpus, _, _ = _corpus()
+    quantiser = Int8Quantiser.calibrate(corpus)
+    assert _top9_overlap(quantiser, corpus, corpus[:100]) >= 0.9
+
+
+def test_int8_query_outside_calibration_range_does_not_wrap():
+    corpus, scales, rng = _corpus()
+    quantiser = Int8Quantiser.calibrate(corpus)
+    queries = corpus[:100] + rng.normal(size=(100, corpus.shape[1])).astype(np.float32) * scales * 0.05
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    assert (np.abs(queries) > quantiser.scale * 127).any()  # some values do exceed the range
+
+    q8 = quantiser.quantise(queries)
+    saturated = np.abs(q8) == 127
+    assert np.array_equal(np.sign(q8[saturated]), np.sign(queries[saturated]))
+    assert _top9_overlap(quantiser, corpus, queries) >= 0.85
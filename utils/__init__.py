@@ -1,4 +1,4 @@
 # utils/__init__.py
-from .arabic import normalize, strip_diacritics
+from .arabic import normalize, normalize_many, strip_diacritics
 
-__all__ = ["normalize", "strip_diacritics"]
\ No newline at end of file
+__all__ = ["normalize", "normalize_many", "strip_diacritics"]
\ No newline at end of file
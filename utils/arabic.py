@@ -1,7 +1,16 @@
 # utils/arabic.py   (only the strip_diacritics function changed)
 
 from __future__ import annotations
+import functools
+import re
+import sys
 import unicodedata
+from typing import Iterable
+
+try:  # optional: vectorised code-point path for normalize_many()
+    import numpy as np
+except ImportError:  # pragma: no cover – str.translate() only
+    np = None
 
 _AR_REMAP = str.maketrans(
     {
@@ -11,6 +20,66 @@ _AR_REMAP = str.maketrans(
     }
 )
 
+
+if sys.version_info >= (3, 11):
+    # dict-based str.translate() got much slower in 3.12/3.13 (and already
+    # trails .replace() on 3.11) – a straight chain wins for seven pairs
+    def _apply_remap(text: str) -> str:
+        return (
+            text.replace("إ", "ا").replace("آ", "ا").replace("ٱ", "ا")
+            .replace("ى", "ي").replace("ئ", "ي").replace("ؤ", "و")
+            .replace("ـ", "")
+        )
+else:
+    def _apply_remap(text: str) -> str:
+        return text.translate(_AR_REMAP)
+
+# Characters normalize() never rewrites: ASCII plus the plain Arabic letters
+# (no hamza seats, alif variants, alif-maqṣūra or tatwīl).  A string made of
+# these only is already normal apart from surrounding whitespace.
+_ALREADY_NORMAL_RE = re.compile("[\x00-\x7f\u0621\u0627-\u063a\u0641-\u0648\u064a]*")
+
+# strip_diacritics() for the Arabic block, precomputed: NFD + mark filter
+# folded into one table.  Hamza seats (أ إ آ ؤ ئ …) lose their decomposed
+# hamza mark, harakāt vanish, shadda stays and dagger-alif becomes «ا».
+# A tuple indexed by code point is ~2× faster in str.translate() than a dict.
+_ARABIC_MARK_CHARS = "".join(
+    chr(cp) for cp in range(0x0600, 0x0700) if unicodedata.combining(chr(cp))
+)
+_ARABIC_MARKS = dict.fromkeys(map(ord, _ARABIC_MARK_CHARS), "")
+del _ARABIC_MARKS[0x0651]               # ّ shadda
+_ARABIC_MARKS[0x0670] = "ا"             # ◌ٰ dagger-alif
+_DIACRITIC_TABLE = tuple(
+    unicodedata.normalize("NFD", chr(cp)).translate(_ARABIC_MARKS)
+    if cp >= 0x0600 else chr(cp)
+    for cp in range(0x0700)
+)
+
+# Text the table cannot handle takes the general NFD route: anything beyond
+# ASCII/Latin-1 symbols and the Arabic block, or a dagger-alif followed by a
+# shadda within one run of marks (NFD's canonical ordering swaps those two).
+_NEEDS_NFD_RE = re.compile(
+    f"[^\\x00-\\u00bf\\u0600-\\u06ff]|\u0670[{_ARABIC_MARK_CHARS}]*\u0651"
+)
+
+
+@functools.cache
+def _nfd_marks_table() -> dict[int, str | None]:
+    """Every combining mark → deleted, except shadda (kept) and dagger-alif
+    (→ «ا»).  Built on first use of the general path only."""
+    table: dict[int, str | None] = {
+        cp: None for cp in range(sys.maxunicode + 1) if unicodedata.combining(chr(cp))
+    }
+    del table[0x0651]                   # ّ shadda
+    table[0x0670] = "ا"                 # ◌ٰ dagger-alif
+    return table
+
+
+def _strip_diacritics_nfd(text: str) -> str:
+    """General (slower) path: full NFD, then drop every combining mark."""
+    return unicodedata.normalize("NFD", text).translate(_nfd_marks_table())
+
+
 # ──────────────────────────────────────────────────────────────
 def strip_diacritics(text: str) -> str:
     """
@@ -20,36 +89,76 @@ def strip_diacritics(text: str) -> str:
     """
     if not text:
         return ""
-        
-    out: list[str] = []
-    for ch in unicodedata.normalize("NFD", text):
-        if ch == "\u0670":            # ◌ٰ dagger-alif
-            out.append("ا")           # keep it as a full alif
-        elif ch == "\u0651":          # ّ shadda
-            out.append(ch)            # KEEP shadda
-        elif unicodedata.combining(ch):
-            continue                  # drop all other diacritics
-        else:
-            out.append(ch)
-    result = "".join(out)
-    return result
-
-
-def normalize(text: str) -> str:
+    if text.isascii():  # O(1) flag check on str – nothing to strip
+        return text
+    if _NEEDS_NFD_RE.search(text):
+        return _strip_diacritics_nfd(text)
+    return text.translate(_DIACRITIC_TABLE)
+
+
+# normalize(): strip_diacritics table with _AR_REMAP fused on top, so the
+# Arabic-block path is a single translate() pass
+_FULL_NORMALIZE_TABLE = tuple(ch.translate(_AR_REMAP) for ch in _DIACRITIC_TABLE)
+
+# …and as a uint32 lookup array (every entry is one code point or deleted)
+_DELETED = 0xFFFFFFFF
+_FULL_NORMALIZE_LUT = None if np is None else np.array(
+    [ord(ch) if ch else _DELETED for ch in _FULL_NORMALIZE_TABLE], dtype=np.uint32
+)
+_BULK_NUMPY_MIN_CHARS = 4096           # below this translate() is faster
+
+
+def _translate_codepoints(text: str) -> str:
+    """``text.translate(_FULL_NORMALIZE_TABLE)`` as a NumPy gather + mask."""
+    cps = _FULL_NORMALIZE_LUT[np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)]
+    return cps[cps != _DELETED].tobytes().decode("utf-32-le")
+
+
+def _normalize_core(text: str) -> str:
+    """normalize() without the final whitespace trim."""
+    # Fast paths – nothing to strip or remap.  isascii() is an O(1) flag
+    # check, the regex scan covers bare Arabic roots and mixed text.
+    if text.isascii() or _ALREADY_NORMAL_RE.fullmatch(text):
+        return text
+
+    # Strip diacritics, then map hamza/alif variants.  No أ/إ/آ survives
+    # stripping (NFD splits off the hamza / madda), so a leading hamza
+    # never needs special-casing.
+    if _NEEDS_NFD_RE.search(text):
+        return _apply_remap(_strip_diacritics_nfd(text))
+    return text.translate(_FULL_NORMALIZE_TABLE)
+
+
+def _normalize_impl(text: str) -> str:
     """Full normalisation: strip diacritics, map hamza/alif variants, trim."""
     if not text:
         return ""
-        
-    # First strip diacritics
-    text = strip_diacritics(text)
-    
-    # Then handle hamza forms
-    # For words starting with hamza, keep the hamza form
-    if text.startswith(("أ", "إ", "آ")):
-        # Only normalize the hamza if it's not at the start
-        text = text[0] + text[1:].translate(_AR_REMAP)
+    return _normalize_core(text).strip()
+
+
+# Memoised – queries, lemmas and roots come from a small vocabulary.  Bulk
+# index builds go through normalize_many() / _normalize_impl instead, so
+# they do not flush the query-time entries out of the cache.
+normalize = functools.lru_cache(maxsize=65536)(_normalize_impl)
+
+
+def normalize_many(texts: Iterable[str | None]) -> list[str]:
+    """
+    Bulk :func:`normalize` for index builds – equal to
+    ``[normalize(t) for t in texts]``, but the batch is joined and run
+    through the fused table in a single pass.
+    """
+    texts = [t or "" for t in texts]
+    joined = "\n".join(texts)
+    if joined.count("\n") != len(texts) - 1:   # an item spans lines
+        return [_normalize_impl(t) for t in texts]
+
+    if (
+        np is not None
+        and len(joined) >= _BULK_NUMPY_MIN_CHARS
+        and not _NEEDS_NFD_RE.search(joined)
+    ):
+        joined = _translate_codepoints(joined)   # ~3× faster on large batches
     else:
-        # For other words, normalize all hamza forms
-        text = text.translate(_AR_REMAP)
-    
-    return text.strip()
\ No newline at end of file
+        joined = _normalize_core(joined)
+    return [t.strip() for t in joined.split("\n")]
@@ -1,5 +1,130 @@
+import contextlib
+import hashlib
+import logging
 import os
-from typing import List
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Default model per device: a static (token-averaging) distillation of bge-m3
+# on CPU – ~4× fewer parameters and 256-d vectors – and e5-large on CUDA.
+CPU_DEFAULT_MODEL = "minishlab/potion-multilingual-128M"
+GPU_DEFAULT_MODEL = "intfloat/multilingual-e5-large"
+
+# (query prefix, document prefix) the model was trained with; retrieval
+# quality degrades without them.  Models not listed take raw text.
+_MODEL_PREFIXES: Dict[str, Tuple[str, str]] = {
+    "intfloat/multilingual-e5-large": ("query: ", "passage: "),
+    "google/embeddinggemma-300m": ("task: search result | query: ", "title: none | text: "),
+    # arctic-embed v2.0: queries carry the "query" prompt, documents are raw
+    "Snowflake/snowflake-arctic-embed-m-v2.0": ("query: ", ""),
+    "Snowflake/snowflake-arctic-embed-l-v2.0": ("query: ", ""),
+}
+
+# Matryoshka-trained models: a prefix of their vector is itself a usable
+# embedding, so EMBED_DIM may truncate it.  Other models ignore EMBED_DIM.
+# Each must also be registered in _MODEL_PREFIXES when it uses prompts.
+_MRL_MODELS: FrozenSet[str] = frozenset({
+    "google/embeddinggemma-300m",
+    "Snowflake/snowflake-arctic-embed-m-v2.0",
+    "Snowflake/snowflake-arctic-embed-l-v2.0",
+})
+
+
+def _resolve_device(device: str | None = None) -> str:
+    """*device* if given, else ``"cuda"`` when torch sees a GPU, else ``"cpu"``."""
+    if device:
+        return device
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+class _EmbeddingDiskCache:
+    """Persistent ``(model, text) → float16 vector`` store in one SQLite file.
+
+    Repeated queries skip the forward pass entirely.  Keys are 16-byte
+    blake2b digests of the model's cache id and the text, so switching
+    models (or EMBED_DIM) never serves stale vectors.  Once *max_entries*
+    is exceeded the oldest insertions are dropped.
+    """
+
+    _LOOKUP_CHUNK = 500  # stay below SQLite's bound-parameter limit
+
+    def __init__(self, directory: str | Path, model_name: str, max_entries: int = 100_000):
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path / "embeddings.sqlite3", check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS emb (key BLOB PRIMARY KEY, vec BLOB NOT NULL)")
+        self._lock = threading.Lock()  # one connection shared by the API worker threads
+        self._model = model_name.encode() + b"\0"
+        self.max_entries = max_entries
+
+    def key(self, text: str) -> bytes:
+        return hashlib.blake2b(self._model + text.encode(), digest_size=16).digest()
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        found: Dict[bytes, np.ndarray] = {}
+        with self._lock:
+            for i in range(0, len(keys), self._LOOKUP_CHUNK):
+                chunk = keys[i : i + self._LOOKUP_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT key, vec FROM emb WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                )
+                for k, blob in rows:
+                    found[k] = np.frombuffer(blob, dtype=np.float16)
+        return found
+
+    def put_many(self, keys: List[bytes], vecs: np.ndarray) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO emb (key, vec) VALUES (?, ?)",
+                zip(keys, (v.astype(np.float16).tobytes() for v in vecs)),
+            )
+            self._conn.execute(
+                "DELETE FROM emb WHERE rowid <= (SELECT max(rowid) FROM emb) - ?", (self.max_entries,)
+            )
+
+
+class Int8Quantiser:
+    """Symmetric, zero-centred per-dimension int8 quantiser.
+
+    *scale* holds ``max |x_d| / 127`` for every dimension of the calibration
+    set.  No offset is applied, so an int8 dot product stays a weighted sum
+    of ``q_d · x_d`` that :meth:`scores` turns back into a cosine-proportional
+    score.
+    """
+
+    def __init__(self, scale: np.ndarray):
+        self.scale = np.asarray(scale, dtype=np.float32)
+
+    @classmethod
+    def calibrate(cls, embeddings: np.ndarray) -> "Int8Quantiser":
+        """Fit the per-dimension scale on float *embeddings* (e.g. the corpus)."""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        # tiny floor keeps all-zero dimensions finite
+        return cls(np.maximum(np.abs(embeddings).max(axis=0), 1e-12) / 127.0)
+
+    def quantise(self, vecs: np.ndarray) -> np.ndarray:
+        """Map float *vecs* to int8 on the calibrated scale."""
+        # Clip first: query values beyond the corpus range would otherwise
+        # wrap around in the int8 cast and flip sign
+        q = np.clip(vecs / self.scale, -127, 127)
+        return np.rint(q).astype(np.int8)
+
+    def scores(self, matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Cosine-proportional scores of int8 *query* against int8 *matrix* rows.
+
+        Each dimension is re-weighted by its squared scale, which undoes the
+        per-dimension stretch of :meth:`quantise`; a plain integer dot product
+        would favour the low-variance dimensions.
+        """
+        return matrix @ (query * np.square(self.scale))
 
 
 class _SBERTEmbedder:
@@ -8,45 +133,210 @@ class _SBERTEmbedder:
     • Uses `sentence-transformers` under the hood (already in requirements).
     • Exposes `.embed_documents()` and `.embed_query()` so existing code can
       stay unchanged.
+    • Prepends the query / passage prefixes the model was trained with
+      (``_MODEL_PREFIXES``), e.g. ``"query: "`` / ``"passage: "`` for E5.
     • Internally normalises embeddings to unit-length to make cosine similarity
       equivalent to dot-product.
+    • Returns NumPy arrays (no per-float Python objects); call ``.tolist()``
+      on the result where JSON-safe primitives are needed.
+    • *precision* selects the output dtype: ``float32`` (default), ``float16``
+      (half the memory, same ranking) or ``int8``.  int8 goes through an
+      :class:`Int8Quantiser` fitted on a calibration set (see
+      :meth:`calibrate`) so documents and queries share one quantiser;
+      score with :meth:`int8_scores`.
+    • Runs on CUDA when available (fp16 weights + autocast), else on CPU with
+      ``TORCH_NUM_THREADS`` (default 4) intra-op threads.
     """
 
-    def __init__(self, model_name: str, device: str | None = None):
-        from sentence_transformers import SentenceTransformer  # local import to avoid hard dep at import time
+    PRECISIONS = ("float32", "float16", "int8")
+
+    def __init__(
+        self,
+        model_name: str,
+        device: str | None = None,
+        batch_size: int = 64,
+        precision: str = "float32",
+        cache_dir: str | Path | None = None,
+        embed_dim: int = 0,
+    ):
+        import torch  # local imports to avoid hard dep at import time
+        from sentence_transformers import SentenceTransformer
+
+        if precision not in self.PRECISIONS:
+            raise ValueError(f"Unsupported embedding precision {precision!r}; expected one of {self.PRECISIONS}")
 
-        self.model = SentenceTransformer(model_name, device=device or "cpu")
+        self._torch = torch
+        self.device = _resolve_device(device)
+        if self.device == "cpu":
+            # Encoder GEMMs scale poorly past a few threads (sync overhead
+            # dominates); TORCH_NUM_THREADS overrides the default of 4.
+            torch.set_num_threads(int(os.getenv("TORCH_NUM_THREADS", "4")))
+            try:
+                torch.set_num_interop_threads(1)
+            except RuntimeError:  # only settable before torch's first parallel op
+                pass
+        self.model = SentenceTransformer(model_name, device=self.device)
+        if self.device.startswith("cuda"):
+            self.model.half()  # tensor cores; halves weight / activation traffic
+        self.batch_size = batch_size
+        self.precision = precision
+        self.int8: Int8Quantiser | None = None  # set by calibrate()
+
+        self.model_name = model_name
+        self.query_prefix, self.doc_prefix = _MODEL_PREFIXES.get(model_name, ("", ""))
+        if embed_dim and model_name not in _MRL_MODELS:
+            logger.warning("EMBED_DIM=%d ignored: %s is not Matryoshka-trained", embed_dim, model_name)
+            embed_dim = 0
+        self.embed_dim = embed_dim  # 0 → the model's native width
+
+        # Identifies the vector space (model + prefixes + width) for caches
+        self.cache_id = model_name
+        if self.doc_prefix:  # vectors of prefixed passages ≠ the raw-text ones
+            self.cache_id += "_prefixed"
+        if embed_dim:
+            self.cache_id += f"_dim{embed_dim}"
+
+        self._cache: _EmbeddingDiskCache | None = None
+        if cache_dir:
+            try:
+                self._cache = _EmbeddingDiskCache(cache_dir, self.cache_id)
+            except (OSError, sqlite3.Error) as exc:  # read-only FS etc. → no cache
+                logger.warning("Embedding cache disabled (%s): %s", cache_dir, exc)
 
     # --------------------------------------------------------------------- #
-    def _encode(self, texts):
-        vecs = self.model.encode(
-            texts,
-            show_progress_bar=False,
-            convert_to_numpy=True,
-            normalize_embeddings=True,  # ← ensures cosine = dot product
+    def _encode(self, texts: List[str], batch_size: int | None = None) -> np.ndarray:
+        torch = self._torch
+        autocast = (
+            torch.autocast(device_type="cuda", dtype=torch.float16)
+            if self.device.startswith("cuda")
+            else contextlib.nullcontext()
         )
-        return vecs.tolist()  # convert to Py primitives for JSON safety
+        # No length bucketing needed here: encode() itself sorts *texts* by
+        # length, batches neighbours and restores the input order.
+        with torch.inference_mode(), autocast:
+            vecs = self.model.encode(
+                texts,
+                batch_size=batch_size or self.batch_size,
+                show_progress_bar=False,
+                convert_to_numpy=True,
+                normalize_embeddings=True,  # ← ensures cosine = dot product
+            )
+        vecs = vecs.astype(np.float32, copy=False)  # fp16 model → float32 contract
+        if self.embed_dim and self.embed_dim < vecs.shape[1]:
+            vecs = vecs[:, : self.embed_dim]
+            vecs = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)  # keep cosine = dot
+        return vecs
+
+    def _encode_cached(self, texts: List[str], batch_size: int | None = None) -> np.ndarray:
+        """:meth:`_encode` that only runs the model on texts missing from the disk cache."""
+        if self._cache is None or not texts:
+            return self._encode(texts, batch_size)
+
+        # A cache failure (e.g. "database is locked" with several workers on
+        # one file) must never fail the embedding itself
+        keys = [self._cache.key(t) for t in texts]
+        try:
+            hits = self._cache.get_many(keys)
+        except sqlite3.Error as exc:
+            logger.warning("Embedding cache lookup failed, encoding without it: %s", exc)
+            return self._encode(texts, batch_size)
+        miss = [i for i, k in enumerate(keys) if k not in hits]
+        fresh = self._encode([texts[i] for i in miss], batch_size) if miss else None
+        if miss:
+            try:
+                self._cache.put_many([keys[i] for i in miss], fresh)
+            except sqlite3.Error as exc:
+                logger.warning("Embedding cache write failed: %s", exc)
+
+        dim = fresh.shape[1] if miss else len(next(iter(hits.values())))
+        out = np.empty((len(texts), dim), dtype=np.float32)
+        for i, k in enumerate(keys):
+            if k in hits:
+                out[i] = hits[k]
+        if miss:
+            out[miss] = fresh
+        return out
 
     # ------------------------------------------------------------------ #
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:  # noqa: D401
-        """Return a list of embeddings for *texts*."""
-        return self._encode(texts)
+    def calibrate(self, embeddings: np.ndarray) -> None:
+        """Fix the int8 quantiser from float *embeddings* (e.g. the corpus)."""
+        self.int8 = Int8Quantiser.calibrate(embeddings)
+
+    def quantise(self, vecs: np.ndarray, precision: str | None = None) -> np.ndarray:
+        """Convert float32 embeddings to *precision* (default: the instance's)."""
+        precision = precision or self.precision
+        if precision == "float32":
+            return vecs
+        if precision == "float16":
+            return vecs.astype(np.float16)
+        if self.int8 is None:
+            raise RuntimeError("int8 embeddings need a calibration set – call calibrate() first")
+        return self.int8.quantise(vecs)
+
+    def int8_scores(self, matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Cosine-proportional scores of int8 *query* against int8 *matrix* rows."""
+        return self.int8.scores(matrix, query)
+
+    def embed_documents(
+        self,
+        texts: List[str],
+        batch_size: int | None = None,
+        precision: str | None = None,
+    ) -> np.ndarray:  # noqa: D401
+        """Return an ``(len(texts), dim)`` matrix of embeddings.
+
+        Without a prior :meth:`calibrate`, an int8 request calibrates on
+        *texts* themselves.
+        """
+        if self.doc_prefix:
+            texts = [f"{self.doc_prefix}{t}" for t in texts]
+        vecs = self._encode_cached(texts, batch_size)
+        if (precision or self.precision) == "int8" and self.int8 is None:
+            self.calibrate(vecs)
+        return self.quantise(vecs, precision)
 
-    def embed_query(self, query: str) -> List[float]:  # noqa: D401
-        """Return the embedding vector for a single query string."""
-        return self._encode([query])[0]
+    def embed_query(self, query: str, precision: str | None = None) -> np.ndarray:  # noqa: D401
+        """Return the 1-D embedding vector for a single query string."""
+        return self.quantise(self._encode_cached([f"{self.query_prefix}{query}"]), precision)[0]
 
 
 # ----------------------------------------------------------------------- #
 # Public helper
 # ----------------------------------------------------------------------- #
 
+_INSTANCE_LOCK = threading.Lock()
+
+
 def get_embeddings():
-    """Singleton factory for the default multilingual embedding model."""
-    model_name = os.getenv("EMBEDDING_MODEL_NAME", "intfloat/multilingual-e5-large")
+    """Singleton factory for the default multilingual embedding model.
 
+    ``EMBEDDING_MODEL_NAME`` wins; otherwise the model follows the device
+    (:data:`CPU_DEFAULT_MODEL` / :data:`GPU_DEFAULT_MODEL`).
+    """
     if not hasattr(get_embeddings, "_INSTANCE"):
-        device = os.getenv("EMBEDDING_DEVICE", "cpu")
-        get_embeddings._INSTANCE = _SBERTEmbedder(model_name=model_name, device=device)
+        # double-checked: concurrent first callers must not load the model twice
+        with _INSTANCE_LOCK:
+            if not hasattr(get_embeddings, "_INSTANCE"):
+                device = _resolve_device(os.getenv("EMBEDDING_DEVICE"))  # unset → CUDA if available
+                model_name = os.getenv("EMBEDDING_MODEL_NAME") or (
+                    CPU_DEFAULT_MODEL if device == "cpu" else GPU_DEFAULT_MODEL
+                )
+                precision = os.getenv("EMBEDDING_PRECISION", "float32")
+                cache_dir = os.getenv("EMBED_CACHE_DIR", ".embed_cache")  # empty → no disk cache
+                embed_dim = int(os.getenv("EMBED_DIM", "0"))  # Matryoshka truncation, 0 = off
+                get_embeddings._INSTANCE = _SBERTEmbedder(
+                    model_name=model_name,
+                    device=device,
+                    precision=precision,
+                    cache_dir=cache_dir,
+                    embed_dim=embed_dim,
+                )
+
+    return get_embeddings._INSTANCE
+
 
-    return get_embeddings._INSTANCE 
\ No newline at end of file
+def warmup() -> None:
+    """Load the embedding model and run one forward pass now (e.g. at app
+    start-up) so the first user query does not pay for it."""
+    # _encode, not embed_query: a disk-cache hit would skip the forward pass
+    get_embeddings()._encode(["warmup"])
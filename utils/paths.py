@@ -3,11 +3,54 @@
 Centralised, import-safe file-system paths.
 Adjust DATA_DIR if you relocate JSONL resources.
 """
+import functools
+import json
+import mmap
 from pathlib import Path
+from typing import Any, Iterator
+
+try:  # optional: Rust-backed JSON parsing for the JSONL loaders
+    from orjson import loads as _json_loads
+except ImportError:  # pragma: no cover – stdlib fallback (accepts bytes too)
+    _json_loads = json.loads
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 
 MORPHOLOGY_FILE = DATA_DIR / "quran_morphology.jsonl"
 ROOT_ANALYSIS_FILE = DATA_DIR / "root_analysis.jsonl"
-DICTIONARY_FILE = DATA_DIR / "arabic_dictionary.jsonl"
\ No newline at end of file
+DICTIONARY_FILE = DATA_DIR / "arabic_dictionary.jsonl"
+
+# Plain-str twins for open() / os.path in loaders (no per-call __fspath__)
+MORPHOLOGY_FILE_STR = str(MORPHOLOGY_FILE)
+ROOT_ANALYSIS_FILE_STR = str(ROOT_ANALYSIS_FILE)
+DICTIONARY_FILE_STR = str(DICTIONARY_FILE)
+
+
+@functools.lru_cache(maxsize=8)
+def resolve_path(path: str | Path) -> Path:
+    """``Path(path)``, memoised – retrievers get the same few files per call."""
+    return Path(path)
+
+
+def open_mmap(path: str | Path) -> mmap.mmap:
+    """Read-only mapping of *path*.  Pages come straight from the OS page
+    cache, which every worker process mapping the same file shares."""
+    with open(path, "rb") as fh:  # the mapping outlives the descriptor
+        return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def iter_jsonl_mmap(path: str | Path) -> Iterator[Any]:
+    """Parse a JSONL file line by line from an mmap (bytes in, no text-mode
+    decode / buffering layer).  Raises FileNotFoundError like open()."""
+    try:
+        mm = open_mmap(path)
+    except ValueError:  # mmap() refuses empty files – nothing to yield
+        return
+    with mm:
+        for line in iter(mm.readline, b""):
+            try:
+                obj = _json_loads(line)
+            except ValueError:  # orjson rejects the NaN literals json accepts
+                obj = json.loads(line)
+            yield obj